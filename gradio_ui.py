@@ -31,9 +31,9 @@ def convert_pdf_with_ui(pdf_file, output_filename, include_toc, detect_tables, f
         # Create temp directory for processing
         temp_dir = Path(tempfile.mkdtemp())
 
-        # Save uploaded PDF to temp location
+        # Read the upload once and parse it from memory instead of copying it
         pdf_path = temp_dir / "input.pdf"
-        shutil.copy(pdf_file.name, pdf_path)
+        pdf_bytes = Path(pdf_file.name).read_bytes()
 
         # Set output filename
         if not output_filename or output_filename.strip() == "":
@@ -45,17 +45,23 @@ def convert_pdf_with_ui(pdf_file, output_filename, include_toc, detect_tables, f
         output_path = temp_dir / f"{output_filename}.md"
 
         # Convert PDF to Markdown with custom tolerance
-        converter = PDFToMarkdownConverter(str(pdf_path), font_size_tolerance=font_tolerance)
-        converter.save_markdown(str(output_path), include_toc=include_toc, detect_tables=detect_tables)
+        converter = PDFToMarkdownConverter(str(pdf_path), font_size_tolerance=font_tolerance, pdf_bytes=pdf_bytes)
+        converter.save_markdown(str(output_path), include_toc=include_toc, detect_tables=detect_tables,
+                                use_cache=True)
 
         # Prepare status message
         status = f"✅ **Conversion Successful!**\n\n"
         status += f"📄 **Markdown file:** `{output_filename}.md`\n"
 
-        # Font normalization stats
+        if converter.from_cache:
+            status += "♻️ **Cache:** Reused the previous conversion of this PDF\n"
+
+        # Font normalization stats (a cached result skips the analysis that produces them)
         unique_fonts = len(converter.normalized_font_map)
         normalized_fonts = len(set(converter.normalized_font_map.values()))
-        if unique_fonts > normalized_fonts:
+        if converter.from_cache:
+            status += "🔧 **Font sizes normalized:** not available for a cached result\n"
+        elif unique_fonts > normalized_fonts:
             status += f"🔧 **Font sizes normalized:** {unique_fonts} → {normalized_fonts} (tolerance: {font_tolerance}pt)\n"
 
         # Check if images were extracted
@@ -69,7 +75,9 @@ def convert_pdf_with_ui(pdf_file, output_filename, include_toc, detect_tables, f
             shutil.make_archive(str(images_zip_path), 'zip', converter.images_dir)
             images_zip = str(images_zip_path) + '.zip'
 
-        if converter.headings:
+        if converter.from_cache:
+            status += "📑 **Headings detected:** not available for a cached result\n"
+        elif converter.headings:
             status += f"📑 **Headings detected:** {len(converter.headings)}\n"
 
         if include_toc:
@@ -1,73 +1,117 @@
-import re
+import io
+import bisect
+import contextlib
+import heapq
+import os
+import hashlib
+import shutil
+import stat
+import tempfile
+import multiprocessing
 import fitz  # PyMuPDF
 from pathlib import Path
-from typing import List, Dict, Optional
-from collections import defaultdict
+from typing import List, Dict, Optional, Iterable, Iterator, TextIO
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from unicodedata import normalize as _unorm
+
+from pdf_to_markdown_fastpath import (
+    _font_is_monospace,
+    _has_code_pattern,
+    _is_bold,
+    _is_italic,
+    _normalize_font_size,
+    _spans_to_markdown_lines,
+)
+
+# Starting worker interpreters (which import PyMuPDF) costs far more than a short
+# document takes to convert in-process, so the pool is only used from this many pages
+_POOL_MIN_PAGES = 100
+
+# detect_table gives up once this many rows share no column position
+_TABLE_PROBE_ROWS = 10
+
+# (font_name, flags) -> (is_bold, is_italic, is_monospace), shared by every page
+# converted in this process; bounded by the number of distinct fonts seen
+_font_info_cache = {}
+
+# Part of every cache key; bump whenever the Markdown output changes so entries
+# written by an older version are not reused
+_CACHE_VERSION = 1
+
+# Document opened once per pool worker by _init_worker
+_worker_doc = None
 
 
 class PDFToMarkdownConverter:
-    def __init__(self, pdf_path: str, font_size_tolerance: float = 0.5):
+    # Converted Markdown (and images) keyed by PDF content hash and conversion options,
+    # in a per-user directory that nobody else can read or plant entries in
+    _CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "pdf2md"
+
+    def __init__(self, pdf_path: str, font_size_tolerance: float = 0.5, num_workers: Optional[int] = None,
+                 pdf_bytes: Optional[bytes] = None):
         """
         Initialize PDF to Markdown converter
 
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file (only used for output naming when pdf_bytes is given)
             font_size_tolerance: Tolerance for font size normalization (default: 0.5pt)
+            num_workers: Worker processes for documents of _POOL_MIN_PAGES pages or more
+                (default: min(cpu_count, 4), 1 disables); shorter documents convert in-process
+            pdf_bytes: PDF content already in memory; opened directly instead of reading pdf_path
         """
         self.pdf_path = Path(pdf_path)
-        self.doc = fitz.open(str(self.pdf_path))
-        self.images_dir = None
+        # What pool workers open their own document from; handles cannot be shared
+        self._pdf_source = pdf_bytes if pdf_bytes is not None else str(self.pdf_path)
+        self.doc = _open_document(self._pdf_source)
+        self.from_cache = False  # Set when save_markdown reused a cached conversion
+        self.images_dir = self.pdf_path.parent / f"{self.pdf_path.stem}_images"
         self.headings = []
         self.font_sizes = defaultdict(int)
         self.font_size_tolerance = font_size_tolerance
         self.normalized_font_map = {}  # Maps actual sizes to normalized sizes
+        self._page_dicts = []  # Text blocks per page, cached by analyze_font_sizes for in-process conversion
+        self._pool = None  # Worker pool while a conversion of a long document runs
+        self._xref_cache = {}  # Maps image xrefs to already saved relative paths
+        self._img_pool = None  # Thread pool for image writes while a conversion runs
+        self._img_writes = []  # Pending image write futures
+        self.num_workers = num_workers if num_workers is not None else min(os.cpu_count() or 1, 4)
 
     def normalize_font_size(self, size: float) -> float:
         """
         Normalize font sizes to handle slight variations
         Groups similar sizes together (e.g., 24.0, 24.2, 24.5 → 24.0)
         """
-        # Round to nearest 0.5 or use tolerance
-        if self.font_size_tolerance >= 1.0:
-            normalized = round(size)
-        else:
-            normalized = round(size / self.font_size_tolerance) * self.font_size_tolerance
+        return _normalize_font_size(size, self.font_size_tolerance)
 
-        return round(normalized, 1)
-
-    def is_bold(self, font_name: str, font_flags: int) -> bool:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def is_bold(font_name: str, font_flags: int) -> bool:
         """Detect if text is bold based on font name and flags"""
-        bold_keywords = ['bold', 'heavy', 'black', 'semibold', 'demibold']
-        font_lower = font_name.lower()
-
-        # Check font name
-        has_bold_name = any(keyword in font_lower for keyword in bold_keywords)
+        return _is_bold(font_name, font_flags)
 
-        # Check font flags (bit 16 is bold flag in PDF)
-        has_bold_flag = bool(font_flags & (1 << 16))
-
-        return has_bold_name or has_bold_flag
-
-    def is_italic(self, font_name: str, font_flags: int) -> bool:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def is_italic(font_name: str, font_flags: int) -> bool:
         """Detect if text is italic based on font name and flags"""
-        italic_keywords = ['italic', 'oblique', 'slant']
-        font_lower = font_name.lower()
-
-        # Check font name
-        has_italic_name = any(keyword in font_lower for keyword in italic_keywords)
-
-        # Check font flags (bit 6 is italic flag in PDF)
-        has_italic_flag = bool(font_flags & (1 << 6))
-
-        return has_italic_name or has_italic_flag
+        return _is_italic(font_name, font_flags)
 
-    def detect_table(self, blocks: List[Dict]) -> Optional[List[List[str]]]:
+    @staticmethod
+    def detect_table(blocks: List[Dict]) -> Optional[List[List[str]]]:
         """
         Detect if blocks form a table structure
         Returns table data if detected, None otherwise
         """
-        # Group blocks by Y coordinate (rows)
+        # Too few text blocks to form a table; skip touching the spans at all
+        num_text_blocks = sum(1 for block in blocks if "lines" in block)
+        if num_text_blocks < 3:
+            return None
+
+        # Group blocks by Y coordinate (rows), counting column positions as we go
         rows = defaultdict(list)
+        x_positions = defaultdict(int)
+        has_repeated_x = False
 
         for block in blocks:
             if "lines" not in block:
@@ -77,32 +121,39 @@ class PDFToMarkdownConverter:
             y_pos = round(bbox[1], 1)  # Top Y coordinate
 
             for line in block["lines"]:
-                text = ""
-                for span in line["spans"]:
-                    text += span["text"] + " "
-                text = text.strip()
+                # NFKC folds ligatures and full-width forms so cells match body text
+                text = _unorm("NFKC", " ".join(span["text"] for span in line["spans"])).strip()
 
                 if text:
                     x_pos = round(line["bbox"][0], 1)  # Left X coordinate
                     rows[y_pos].append((x_pos, text))
+                    x_positions[x_pos] += 1
+                    if x_positions[x_pos] == 2:
+                        has_repeated_x = True
+
+            # Many rows without a single shared column position: not a table
+            if len(rows) > _TABLE_PROBE_ROWS and not has_repeated_x:
+                return None
 
         # Check if we have aligned columns (table-like structure)
-        if len(rows) < 2:
+        if len(rows) < 3:
             return None
 
         # Sort rows by Y position
         sorted_rows = sorted(rows.items())
 
-        # Check for consistent column positions
-        x_positions = defaultdict(int)
-        for y_pos, cells in sorted_rows:
-            for x_pos, text in cells:
-                x_positions[x_pos] += 1
-
-        # If we have at least 2 consistent columns appearing in multiple rows
-        common_x_positions = [x for x, count in x_positions.items() if count >= 2]
+        # If we have at least 2 consistent columns appearing in multiple rows.
+        # Columns are numbered in first-seen order of the y-sorted rows, not of the
+        # block stream, which PyMuPDF returns in content-stream order
+        common_x_positions = list(dict.fromkeys(
+            x_pos for y_pos, cells in sorted_rows for x_pos, text in cells if x_positions[x_pos] >= 2
+        ))
 
         if len(common_x_positions) >= 2:
+            # A sorted copy of the columns allows binary search
+            col_index = {x: i for i, x in enumerate(common_x_positions)}
+            sorted_cols = sorted(common_x_positions)
+
             # Build table
             table_data = []
             for y_pos, cells in sorted_rows:
@@ -110,10 +161,21 @@ class PDFToMarkdownConverter:
                 cells_sorted = sorted(cells, key=lambda x: x[0])
 
                 for x_pos, text in cells_sorted:
-                    # Find closest column
-                    closest_col = min(range(len(common_x_positions)),
-                                      key=lambda i: abs(common_x_positions[i] - x_pos))
-                    row[closest_col] = text
+                    # Find closest column among the two neighbours of x_pos
+                    i = bisect.bisect_left(sorted_cols, x_pos)
+                    if i == len(sorted_cols):
+                        closest = sorted_cols[i - 1]
+                    elif i == 0:
+                        closest = sorted_cols[0]
+                    else:
+                        left, right = sorted_cols[i - 1], sorted_cols[i]
+                        left_dist, right_dist = x_pos - left, right - x_pos
+                        # On a tie prefer the earlier column, as min() over columns did
+                        if left_dist < right_dist or (left_dist == right_dist and col_index[left] < col_index[right]):
+                            closest = left
+                        else:
+                            closest = right
+                    row[col_index[closest]] = text
 
                 table_data.append(row)
 
@@ -121,13 +183,29 @@ class PDFToMarkdownConverter:
 
         return None
 
-    def format_table_markdown(self, table_data: List[List[str]]) -> str:
-        """Convert table data to Markdown table format"""
+    @staticmethod
+    def format_table_markdown(table_data: List[List[str]], pretty: bool = False) -> str:
+        """
+        Convert table data to Markdown table format
+
+        Args:
+            table_data: Table rows, the first one is used as header
+            pretty: Pad cells so the pipes line up; renderers ignore the padding
+        """
         if not table_data:
             return ""
 
-        # Calculate column widths
         num_cols = max(len(row) for row in table_data)
+
+        if not pretty:
+            # Bare pipes: no column width pass, short rows padded with empty cells
+            lines = ["| " + " | ".join(table_data[0]) + " |",
+                     "|" + "|".join("---" for _ in range(num_cols)) + "|"]
+            for row in table_data[1:]:
+                lines.append("| " + " | ".join(row + [""] * (num_cols - len(row))) + " |")
+            return "\n".join(lines)
+
+        # Calculate column widths
         col_widths = [0] * num_cols
 
         for row in table_data:
@@ -149,81 +227,84 @@ class PDFToMarkdownConverter:
 
             # Data rows
             for row in table_data[1:]:
-                row_str = "| " + " | ".join(cell.ljust(col_widths[i]) if i < len(row) else " " * col_widths[i]
+                row_str = "| " + " | ".join(row[i].ljust(col_widths[i]) if i < len(row) else " " * col_widths[i]
                                             for i in range(num_cols)) + " |"
                 lines.append(row_str)
 
         return "\n".join(lines)
 
     def analyze_font_sizes(self):
-        """Analyze font sizes in the document to determine heading levels"""
-        raw_sizes = defaultdict(int)
-
-        for page in self.doc:
-            blocks = page.get_text("dict")["blocks"]
-            for block in blocks:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            size = span["size"]
-                            normalized = self.normalize_font_size(size)
-                            raw_sizes[size] += 1
-                            self.font_sizes[normalized] += 1
-                            self.normalized_font_map[size] = normalized
-
-        # Sort normalized font sizes to determine heading hierarchy
-        sorted_sizes = sorted(self.font_sizes.keys(), reverse=True)
+        """
+        Analyze font sizes in the document to determine heading levels
+
+        With a worker pool running, every worker histograms its own pages and only
+        the size counts come back. Otherwise the text blocks of every page are
+        cached in self._page_dicts so the conversion pass does not have to
+        extract them a second time.
+        """
+        self._page_dicts = []
+        raw_counts = Counter()
+
+        if self._pool is not None:
+            page_counts = self._pool.imap(_worker_size_counts, range(len(self.doc)))
+        else:
+            self._page_dicts = [_page_blocks(page) for page in self.doc]
+            page_counts = map(_page_size_counts, self._page_dicts)
+
+        for counts in page_counts:
+            raw_counts.update(counts)
+
+        # Only the few distinct raw sizes are normalized in Python, so the keys
+        # match normalize_font_size() during conversion exactly
+        for size, count in raw_counts.items():
+            normalized = self.normalize_font_size(size)
+            self.font_sizes[normalized] += count
+            self.normalized_font_map[size] = normalized
+
+        # Largest normalized font sizes determine heading hierarchy (max 6 heading levels)
+        largest_sizes = heapq.nlargest(6, self.font_sizes)
 
         # Map font sizes to markdown heading levels
         self.size_to_heading = {}
         heading_level = 1
-        for size in sorted_sizes[:6]:  # Max 6 heading levels
+        for size in largest_sizes:
             if self.font_sizes[size] > 2:  # Only if used more than twice
                 self.size_to_heading[size] = heading_level
                 heading_level += 1
 
-    def is_code_block(self, font_name: str, text: str) -> bool:
+    @staticmethod
+    def is_code_block(font_name: str, text: str) -> bool:
         """Detect if text is likely code based on font and content"""
-        code_fonts = ['courier', 'mono', 'consola', 'code']
-
-        # Check if font is monospace
-        is_monospace = any(cf in font_name.lower() for cf in code_fonts)
-
-        # Check if text contains code-like patterns
-        code_patterns = [
-            r'^\s*(def|class|import|from|if|for|while|return)\s+',
-            r'[\{\}\[\]\(\);]',
-            r'^\s*[a-zA-Z_][a-zA-Z0-9_]*\s*=',
-            r'^\s*//|^\s*#|^\s*/\*',
-        ]
-        has_code_pattern = any(re.search(pattern, text) for pattern in code_patterns)
-
-        return is_monospace or has_code_pattern
+        return _font_is_monospace(font_name) or _has_code_pattern(text)
 
     def extract_images(self, page_num: int, page) -> List[str]:
         """Extract images from a page and save them"""
-        if self.images_dir is None:
-            self.images_dir = self.pdf_path.parent / f"{self.pdf_path.stem}_images"
-            self.images_dir.mkdir(exist_ok=True)
-
         image_refs = []
         image_list = page.get_images()
 
         for img_index, img in enumerate(image_list):
             xref = img[0]
-            base_image = self.doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
 
-            # Save image
-            image_filename = f"page_{page_num + 1}_img_{img_index + 1}.{image_ext}"
-            image_path = self.images_dir / image_filename
+            # Logos and backgrounds repeat across pages; decode and save each xref once
+            image_ref = self._xref_cache.get(xref)
+            if image_ref is None:
+                base_image = self.doc.extract_image(xref)
+                image_bytes = base_image["image"]
+                image_ext = base_image["ext"]
+
+                # Save image; during a conversion the write overlaps with the next decode
+                image_filename = f"page_{page_num + 1}_img_{img_index + 1}.{image_ext}"
+                image_path = self.images_dir / image_filename
+                self.images_dir.mkdir(exist_ok=True)
+                if self._img_pool is None:
+                    image_path.write_bytes(image_bytes)
+                else:
+                    self._img_writes.append(self._img_pool.submit(image_path.write_bytes, image_bytes))
 
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
+                # Relative path for markdown
+                image_ref = self._xref_cache[xref] = f"{self.images_dir.name}/{image_filename}"
 
-            # Return relative path for markdown
-            image_refs.append(f"{self.images_dir.name}/{image_filename}")
+            image_refs.append(image_ref)
 
         return image_refs
 
@@ -232,165 +313,269 @@ class PDFToMarkdownConverter:
         if not self.headings:
             return ""
 
-        toc = "## Table of Contents\n\n"
-        for level, text in self.headings:
-            indent = "  " * (level - 1)
-            # Create GitHub-friendly anchor
-            anchor = text.lower()
-            anchor = re.sub(r'[^\w\s-]', '', anchor)
-            anchor = re.sub(r'[-\s]+', '-', anchor)
-            toc += f"{indent}- [{text}](#{anchor})\n"
+        # Anchors were built once when the headings were detected
+        lines = ["## Table of Contents", ""]
+        lines.extend(f"{'  ' * (level - 1)}- [{text}](#{anchor})" for level, text, anchor in self.headings)
 
-        return toc + "\n"
+        return "\n".join(lines) + "\n\n"
 
-    def convert_to_markdown(self, include_toc: bool = True, detect_tables: bool = True) -> str:
-        """Convert PDF to Markdown"""
-        self.analyze_font_sizes()
-
-        markdown_content = []
-        in_code_block = False
-        code_buffer = []
-
-        for page_num, page in enumerate(self.doc):
-            # Extract images first
-            images = self.extract_images(page_num, page)
-
-            # Get text with formatting
-            blocks = page.get_text("dict")["blocks"]
-
-            # Try to detect table first
-            if detect_tables:
-                table_data = self.detect_table(blocks)
-                if table_data:
-                    markdown_content.append("\n" + self.format_table_markdown(table_data) + "\n")
-                    # Add images after table
-                    for img_ref in images:
-                        markdown_content.append(f"\n![Image]({img_ref})\n")
-                    continue  # Skip normal processing for this page
-
-            for block in blocks:
-                if "lines" not in block:
-                    continue
-
-                for line in block["lines"]:
-                    line_text = ""
-                    current_font_size = None
-                    current_font_name = ""
-                    is_bold_text = False
-                    is_italic_text = False
-
-                    # Process each span in the line
-                    formatted_spans = []
-
-                    for span in line["spans"]:
-                        text = span["text"].strip()
-                        if not text:
-                            continue
-
-                        font_size = self.normalize_font_size(span["size"])
-                        font_name = span["font"]
-                        font_flags = span.get("flags", 0)
-
-                        current_font_size = font_size
-                        current_font_name = font_name
-
-                        # Detect formatting
-                        span_is_bold = self.is_bold(font_name, font_flags)
-                        span_is_italic = self.is_italic(font_name, font_flags)
-
-                        # Apply markdown formatting
-                        formatted_text = text
-                        if span_is_bold and span_is_italic:
-                            formatted_text = f"***{text}***"
-                        elif span_is_bold:
-                            formatted_text = f"**{text}**"
-                        elif span_is_italic:
-                            formatted_text = f"*{text}*"
-
-                        formatted_spans.append(formatted_text)
-
-                        # Track overall line formatting
-                        if span_is_bold:
-                            is_bold_text = True
-                        if span_is_italic:
-                            is_italic_text = True
-
-                    line_text = " ".join(formatted_spans)
-
-                    if not line_text:
-                        continue
-
-                    # Check if this is a code block
-                    if self.is_code_block(current_font_name, line_text):
-                        if not in_code_block:
-                            in_code_block = True
-                            markdown_content.append("```")
-                        # Remove markdown formatting from code
-                        clean_code = line_text.replace("**", "").replace("*", "")
-                        code_buffer.append(clean_code)
-                    else:
-                        # Close code block if we were in one
-                        if in_code_block:
-                            markdown_content.extend(code_buffer)
-                            markdown_content.append("```\n")
-                            code_buffer = []
-                            in_code_block = False
-
-                        # Check if this is a heading
-                        if current_font_size in self.size_to_heading:
-                            heading_level = self.size_to_heading[current_font_size]
-                            heading_marker = "#" * heading_level
-                            # Remove formatting from headings (already emphasized by #)
-                            clean_heading = line_text.replace("**", "").replace("*", "")
-                            markdown_line = f"{heading_marker} {clean_heading}"
-                            self.headings.append((heading_level, clean_heading))
-                        else:
-                            # Check for list patterns
-                            list_pattern = r'^(\s*)([-•*]|\d+\.)\s+'
-                            if re.match(list_pattern, line_text):
-                                markdown_line = line_text
-                            else:
-                                markdown_line = line_text
-
-                        markdown_content.append(markdown_line)
-
-            # Add images at the end of the page
-            for img_ref in images:
-                markdown_content.append(f"\n![Image]({img_ref})\n")
+    @classmethod
+    def convert_page(cls, page_num: int, blocks: List[Dict], font_size_tolerance: float,
+                     size_to_heading: Dict[float, int], detect_tables: bool = True,
+                     font_size_map: Optional[Dict[float, float]] = None) -> tuple:
+        """
+        Convert the text of a single page to Markdown fragments
 
-        # Close any remaining code block
-        if in_code_block:
-            markdown_content.extend(code_buffer)
-            markdown_content.append("```\n")
+        Only needs plain data and no document handle. Code blocks are closed at
+        the end of the page so every page is self-contained.
 
-        # Combine everything
-        full_content = "\n\n".join(markdown_content)
+        Args:
+            page_num: Zero-based page index
+            blocks: Text blocks of the page (page.get_text("dict")["blocks"])
+            font_size_tolerance: Tolerance for font size normalization
+            size_to_heading: Normalized font size to heading level map
+            detect_tables: Boolean to detect and convert tables
+            font_size_map: Raw to normalized font sizes (normalized_font_map), looked up before normalizing
+
+        Returns:
+            Tuple of (page_num, markdown fragments, (level, text, anchor) headings)
+        """
+        # Try to detect table first
+        if detect_tables:
+            table_data = cls.detect_table(blocks)
+            if table_data:
+                # Skip normal processing for this page
+                return page_num, ["\n" + cls.format_table_markdown(table_data) + "\n"], []
+
+        markdown_content, headings = _spans_to_markdown_lines(
+            blocks, size_to_heading, _font_info_cache, font_size_map or {}, font_size_tolerance)
+        return page_num, markdown_content, headings
+
+    def iter_markdown(self, detect_tables: bool = True, include_toc: bool = False) -> Iterator[str]:
+        """
+        Yield the Markdown fragments of the document body in page order
 
-        # Add TOC at the beginning if requested
-        if include_toc and self.headings:
-            toc = self.generate_toc()
-            full_content = toc + full_content
+        Requires analyze_font_sizes(); self.headings is filled as pages are yielded.
+        include_toc makes heading anchors avoid the generated TOC heading's own anchor.
+        """
+        # fitz.Document is not thread-safe, so images are decoded on this thread
+        # and only the file writes go to the pool
+        self._img_pool = ThreadPoolExecutor(max_workers=4)
+        try:
+            if self._pool is not None:
+                # Workers extract the blocks from their own document; only options go out
+                args = [(page_num, self.font_size_tolerance, self.size_to_heading, detect_tables,
+                         self.normalized_font_map)
+                        for page_num in range(len(self.doc))]
+                # imap hands results back in page order as soon as each one is ready
+                yield from self._iter_page_results(self._pool.imap(_worker_convert_page, args), include_toc)
+            else:
+                yield from self._iter_page_results(self._convert_cached_pages(detect_tables), include_toc)
+        finally:
+            self._img_pool.shutdown(wait=True)
+            self._img_pool = None
+            img_writes, self._img_writes = self._img_writes, []
+            self._page_dicts = []
+
+        # Surface any failed image write
+        for future in img_writes:
+            future.result()
+
+    def _convert_cached_pages(self, detect_tables: bool) -> Iterator[tuple]:
+        """Convert the pages cached by analyze_font_sizes(), releasing each page's blocks once converted"""
+        for page_num, blocks in enumerate(self._page_dicts):
+            self._page_dicts[page_num] = None
+            yield self.convert_page(page_num, blocks, self.font_size_tolerance, self.size_to_heading,
+                                    detect_tables, self.normalized_font_map)
+
+    def _iter_page_results(self, results: Iterable[tuple], include_toc: bool = False) -> Iterator[str]:
+        """Yield fragments from convert_page() results, adding headings and page images"""
+        anchor_counts = defaultdict(int)
+        if include_toc:
+            # "## Table of Contents" comes first in the output and takes the bare anchor
+            anchor_counts["table-of-contents"] = 1
+
+        for page_num, fragments, headings in results:
+            yield from fragments
+
+            # Repeated headings get GitHub's -1, -2, ... anchor suffixes, in document order
+            for level, text, anchor in headings:
+                count = anchor_counts[anchor]
+                anchor_counts[anchor] += 1
+                self.headings.append((level, text, f"{anchor}-{count}" if count else anchor))
+
+            # Images are extracted here, where the document and the xref cache live
+            for img_ref in self.extract_images(page_num, self.doc[page_num]):
+                yield f"\n![Image]({img_ref})\n"
+
+    def write_markdown(self, out: TextIO, include_toc: bool = True, detect_tables: bool = True):
+        """Convert PDF to Markdown, streaming the result to a text file object"""
+        if self.num_workers > 1 and len(self.doc) >= _POOL_MIN_PAGES:
+            # One pool for both passes. spawn, not fork: behaves the same on every
+            # platform and never forks a multithreaded host such as the Gradio server
+            self._pool = multiprocessing.get_context("spawn").Pool(
+                self.num_workers, initializer=_init_worker, initargs=(self._pdf_source,))
+        try:
+            self.analyze_font_sizes()
+
+            if not include_toc:
+                self._write_body(out, detect_tables)
+                return
+
+            # Headings are only known once the whole body is converted, so spool the
+            # body to a temporary file and write it after the TOC
+            with tempfile.TemporaryFile("w+", encoding="utf-8") as body:
+                self._write_body(body, detect_tables, include_toc=True)
+                if self.headings:
+                    out.write(self.generate_toc())
+                body.seek(0)
+                shutil.copyfileobj(body, out)
+        finally:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+    def _write_body(self, out: TextIO, detect_tables: bool, include_toc: bool = False):
+        """Write body fragments separated by blank lines"""
+        separator = ""
+        for fragment in self.iter_markdown(detect_tables, include_toc):
+            out.write(separator)
+            out.write(fragment)
+            separator = "\n\n"
 
-        return full_content
+    def convert_to_markdown(self, include_toc: bool = True, detect_tables: bool = True) -> str:
+        """Convert PDF to Markdown"""
+        buffer = io.StringIO()
+        self.write_markdown(buffer, include_toc=include_toc, detect_tables=detect_tables)
+        return buffer.getvalue()
+
+    @cached_property
+    def _fingerprint(self) -> str:
+        """PDF content hash for cache keys, only computed once the cache is used"""
+        digest = hashlib.blake2b(digest_size=16)
+        if isinstance(self._pdf_source, bytes):
+            digest.update(self._pdf_source)
+        else:
+            # Hash in chunks rather than holding a second copy of a large PDF in memory
+            with open(self._pdf_source, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def _cache_path(self, suffix: str, include_toc: bool, detect_tables: bool) -> Path:
+        """Cache entry for this PDF's content and conversion options"""
+        # Image links embed the images folder name, so the PDF stem is part of the key
+        key = f"v{_CACHE_VERSION}_{self._fingerprint}_{self.pdf_path.stem}_{self.font_size_tolerance}_{include_toc}_{detect_tables}"
+        return self._CACHE_DIR / f"{key}{suffix}"
+
+    def _cache_dir_is_private(self) -> bool:
+        """
+        Create the cache directory if needed; False unless it is a directory of the current user only
 
-    def save_markdown(self, output_path: str = None, include_toc: bool = True, detect_tables: bool = True):
-        """Convert and save to markdown file"""
+        The cache is optional, so a directory that cannot be created (read-only
+        HOME, service accounts) turns it off instead of failing the conversion.
+        """
+        try:
+            self._CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            st = self._CACHE_DIR.lstat()
+            if not stat.S_ISDIR(st.st_mode):
+                return False
+            if hasattr(os, "getuid") and st.st_uid != os.getuid():
+                return False
+            if st.st_mode & 0o077:
+                self._CACHE_DIR.chmod(0o700)
+        except OSError:
+            return False
+        return True
+
+    def save_markdown(self, output_path: str = None, include_toc: bool = True, detect_tables: bool = True,
+                      use_cache: bool = False):
+        """Convert and save to markdown file, with use_cache reusing a cached result for identical PDFs"""
         if output_path is None:
             output_path = self.pdf_path.parent / f"{self.pdf_path.stem}.md"
 
-        markdown_content = self.convert_to_markdown(include_toc=include_toc, detect_tables=detect_tables)
+        # Never read or write entries in a directory someone else controls
+        use_cache = use_cache and self._cache_dir_is_private()
+
+        if use_cache:
+            cached_md = self._cache_path(".md", include_toc, detect_tables)
+            cached_images = self._cache_path("_images", include_toc, detect_tables)
+
+        if use_cache and cached_md.exists():
+            shutil.copyfile(cached_md, output_path)
+            if cached_images.exists():
+                shutil.copytree(cached_images, self.images_dir, dirs_exist_ok=True)
+            self.from_cache = True
+            return output_path
 
         with open(output_path, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
+            self.write_markdown(f, include_toc=include_toc, detect_tables=detect_tables)
+
+        if use_cache:
+            # The conversion already succeeded; a failed cache write only loses the entry
+            tmp_md = None
+            try:
+                if self.images_dir.exists():
+                    shutil.copytree(self.images_dir, cached_images, dirs_exist_ok=True)
+                # Publish the Markdown last and atomically; its presence marks a complete entry.
+                # mkstemp names are unique across the server's request threads too
+                fd, tmp_md = tempfile.mkstemp(suffix=".tmp", prefix=f"{cached_md.name}.", dir=self._CACHE_DIR)
+                with os.fdopen(fd, "wb") as tmp, open(output_path, "rb") as src:
+                    shutil.copyfileobj(src, tmp)
+                os.replace(tmp_md, cached_md)
+            except OSError:
+                if tmp_md is not None:
+                    with contextlib.suppress(OSError):
+                        os.unlink(tmp_md)
 
         return output_path
 
 
-def convert_pdf_cli(pdf_path: str, output_path: str = None, include_toc: bool = True, detect_tables: bool = True):
+def _open_document(pdf_source):
+    """Open a PDF from its path or its bytes"""
+    if isinstance(pdf_source, bytes):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(pdf_source)
+
+
+def _page_blocks(page) -> List[Dict]:
+    """Text blocks of a page; image blocks are never used, so their bytes are left out"""
+    return page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]
+
+
+def _page_size_counts(blocks: List[Dict]) -> Counter:
+    """Histogram the raw span font sizes of a page's text blocks"""
+    return Counter(span["size"]
+                   for block in blocks if "lines" in block
+                   for line in block["lines"]
+                   for span in line["spans"])
+
+
+def _init_worker(pdf_source):
+    """Pool initializer: open this worker's own document"""
+    global _worker_doc
+    _worker_doc = _open_document(pdf_source)
+
+
+def _worker_size_counts(page_num: int) -> Counter:
+    """Pool worker: font size histogram of one page"""
+    return _page_size_counts(_page_blocks(_worker_doc[page_num]))
+
+
+def _worker_convert_page(args: tuple) -> tuple:
+    """Pool worker: convert one page, extracting its blocks from the worker's document"""
+    page_num, *options = args
+    return PDFToMarkdownConverter.convert_page(page_num, _page_blocks(_worker_doc[page_num]), *options)
+
+
+def convert_pdf_cli(pdf_path: str, output_path: str = None, include_toc: bool = True, detect_tables: bool = True,
+                    use_cache: bool = False):
     """CLI function to convert PDF to Markdown"""
     converter = PDFToMarkdownConverter(pdf_path)
-    output_file = converter.save_markdown(output_path, include_toc, detect_tables)
+    output_file = converter.save_markdown(output_path, include_toc, detect_tables, use_cache=use_cache)
     print(f"✅ Conversion complete!")
+    if converter.from_cache:
+        print("♻️  Reused the cached conversion of this PDF")
     print(f"📄 Markdown file: {output_file}")
     if converter.images_dir and converter.images_dir.exists():
         print(f"🖼️  Images saved to: {converter.images_dir}")
@@ -400,11 +585,16 @@ def convert_pdf_cli(pdf_path: str, output_path: str = None, include_toc: bool =
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) < 2:
-        print("Usage: python pdf_to_markdown.py <pdf_file> [output_file]")
+    # --cache reuses (and stores) conversions in the per-user cache directory
+    args = sys.argv[1:]
+    use_cache = "--cache" in args
+    args = [arg for arg in args if arg != "--cache"]
+
+    if not args:
+        print("Usage: python pdf_to_markdown.py [--cache] <pdf_file> [output_file]")
         sys.exit(1)
 
-    pdf_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    pdf_file = args[0]
+    output_file = args[1] if len(args) > 1 else None
 
-    convert_pdf_cli(pdf_file, output_file)
\ No newline at end of file
+    convert_pdf_cli(pdf_file, output_file, use_cache=use_cache)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Span-processing hot loop for the PDF to Markdown converter
+
+Plain Python with full type annotations and no PyMuPDF imports, so it
+can be compiled ahead of time with mypyc:
+
+    pip install mypy
+    mypyc pdf_to_markdown_fastpath.py
+
+The compiled extension module lands next to this file and is imported in its
+place automatically; without it this module simply runs as regular Python.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from unicodedata import normalize as _unorm
+
+# (font_name, flags) -> (is_bold, is_italic, is_monospace)
+FontInfoCache = Dict[Tuple[str, int], Tuple[bool, bool, bool]]
+
+_BOLD_KEYWORDS = frozenset(['bold', 'heavy', 'black', 'semibold', 'demibold'])
+_ITALIC_KEYWORDS = frozenset(['italic', 'oblique', 'slant'])
+_CODE_FONTS = frozenset(['courier', 'mono', 'consola', 'code'])
+
+# Code-like text patterns, compiled once instead of on every is_code_block call
+_CODE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'^\s*(def|class|import|from|if|for|while|return)\s+',
+    r'[\{\}\[\]\(\);]',
+    r'^\s*[a-zA-Z_][a-zA-Z0-9_]*\s*=',
+    r'^\s*//|^\s*#|^\s*/\*',
+)]
+
+# GitHub-friendly anchor cleanup
+_ANCHOR_BAD = re.compile(r'[^\w\s-]')
+_ANCHOR_DASH = re.compile(r'[-\s]+')
+
+# str.translate table that drops the "*" emphasis markers in one pass
+_STRIP_EMPHASIS = {ord("*"): None}
+
+
+def _slugify(text: str) -> str:
+    """Create a GitHub-friendly anchor for heading text"""
+    anchor = _ANCHOR_BAD.sub('', text.lower())
+    return _ANCHOR_DASH.sub('-', anchor)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_font_size(size: float, tolerance: float) -> float:
+    """Cached font size normalization; documents only use a handful of distinct sizes"""
+    # Round to nearest 0.5 or use tolerance
+    if tolerance >= 1.0:
+        normalized = float(round(size))
+    else:
+        normalized = round(size / tolerance) * tolerance
+
+    return round(normalized, 1)
+
+
+def _is_bold(font_name: str, font_flags: int) -> bool:
+    """Detect if text is bold based on font name and flags"""
+    # Check font flags first (bit 16 is bold flag in PDF), then the font name
+    return bool(font_flags & (1 << 16)) or any(keyword in font_name.lower() for keyword in _BOLD_KEYWORDS)
+
+
+def _is_italic(font_name: str, font_flags: int) -> bool:
+    """Detect if text is italic based on font name and flags"""
+    # Check font flags first (bit 6 is italic flag in PDF), then the font name
+    return bool(font_flags & (1 << 6)) or any(keyword in font_name.lower() for keyword in _ITALIC_KEYWORDS)
+
+
+def _font_is_monospace(font_name: str) -> bool:
+    """Detect if a font is monospace based on its name"""
+    font_lower = font_name.lower()
+    return any(cf in font_lower for cf in _CODE_FONTS)
+
+
+def _has_code_pattern(text: str) -> bool:
+    """Check if text contains code-like patterns"""
+    return any(pattern.search(text) for pattern in _CODE_PATTERNS)
+
+
+def _font_info(font_name: str, font_flags: int, font_info_cache: FontInfoCache) -> Tuple[bool, bool, bool]:
+    """Return (is_bold, is_italic, is_monospace) for a font, computing it once per (name, flags)"""
+    key = (font_name, font_flags)
+    info = font_info_cache.get(key)
+    if info is None:
+        info = (_is_bold(font_name, font_flags), _is_italic(font_name, font_flags), _font_is_monospace(font_name))
+        font_info_cache[key] = info
+    return info
+
+
+def _spans_to_markdown_lines(blocks: List[Dict[str, Any]], size_to_heading: Dict[float, int],
+                             font_info_cache: FontInfoCache, font_size_map: Dict[float, float],
+                             font_size_tolerance: float) -> Tuple[List[str], List[Tuple[int, str, str]]]:
+    """
+    Convert the text blocks of one page to Markdown lines
+
+    Code blocks are closed at the end of the page so every page is self-contained.
+
+    Args:
+        blocks: Text blocks of the page (page.get_text("dict")["blocks"])
+        size_to_heading: Normalized font size to heading level map
+        font_info_cache: Per-font formatting cache, filled as new fonts are seen
+        font_size_map: Raw to normalized font sizes, looked up before normalizing
+        font_size_tolerance: Tolerance for font size normalization
+
+    Returns:
+        Tuple of (markdown lines, (level, text, anchor) headings)
+    """
+    markdown_content: List[str] = []
+    headings: List[Tuple[int, str, str]] = []
+    in_code_block = False
+    code_buffer: List[str] = []
+    formatted_spans: List[str] = []  # Reused for every line
+
+    for block in blocks:
+        if "lines" not in block:
+            continue
+
+        for line in block["lines"]:
+            # Process each span in the line; the last non-empty span sets the line's font
+            formatted_spans.clear()
+            last_size = 0.0
+            last_is_monospace = False
+            has_text = False
+
+            for span in line["spans"]:
+                # NFKC folds ligatures (ﬁ, ﬂ) and full-width forms into plain text
+                text: str = _unorm("NFKC", span["text"]).strip()
+                if not text:
+                    continue
+
+                # Detect formatting
+                span_is_bold, span_is_italic, span_is_monospace = _font_info(
+                    span["font"], span.get("flags", 0), font_info_cache)
+
+                # Apply markdown formatting
+                if span_is_bold and span_is_italic:
+                    text = f"***{text}***"
+                elif span_is_bold:
+                    text = f"**{text}**"
+                elif span_is_italic:
+                    text = f"*{text}*"
+
+                formatted_spans.append(text)
+                last_size = span["size"]
+                last_is_monospace = span_is_monospace
+                has_text = True
+
+            if not has_text:
+                continue
+
+            line_text = " ".join(formatted_spans)
+            current_font_size = font_size_map.get(last_size)
+            if current_font_size is None:
+                current_font_size = _normalize_font_size(last_size, font_size_tolerance)
+
+            # Check if this is a code block
+            if last_is_monospace or _has_code_pattern(line_text):
+                if not in_code_block:
+                    in_code_block = True
+                    markdown_content.append("```")
+                # Remove markdown formatting from code
+                code_buffer.append(line_text.translate(_STRIP_EMPHASIS))
+            else:
+                # Close code block if we were in one
+                if in_code_block:
+                    markdown_content.extend(code_buffer)
+                    markdown_content.append("```\n")
+                    code_buffer = []
+                    in_code_block = False
+
+                # Check if this is a heading
+                heading_level = size_to_heading.get(current_font_size)
+                if heading_level is not None:
+                    heading_marker = "#" * heading_level
+                    # Remove formatting from headings (already emphasized by #)
+                    clean_heading = line_text.translate(_STRIP_EMPHASIS)
+                    markdown_line = f"{heading_marker} {clean_heading}"
+                    headings.append((heading_level, clean_heading, _slugify(clean_heading)))
+                else:
+                    markdown_line = line_text
+
+                markdown_content.append(markdown_line)
+
+    # Close any remaining code block
+    if in_code_block:
+        markdown_content.extend(code_buffer)
+        markdown_content.append("```\n")
+
+    return markdown_content, headings